@@ -6,13 +6,84 @@ Generates plots for cavity flow simulation results
 
 import os
 import sys
-import matplotlib.pyplot as plt
+import io
+import itertools
 import numpy as np
-import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from contextlib import redirect_stdout
+from multiprocessing import Pool
 from pathlib import Path
 
-def plot_residuals(case_dir, reynolds_num, output_dir):
-    """Plot convergence residuals"""
+
+# Upper bound on points sent to the line renderer per residual curve
+MAX_PLOT_POINTS = 5000
+
+# Approximate number of residual rows parsed at a time from large files
+CHUNK_ROWS = 50_000
+
+def count_lines(path, block_size=1 << 20):
+    """Count newlines in a file without holding it in memory"""
+    with open(path, 'rb') as f:
+        return sum(block.count(b'\n') for block in iter(lambda: f.read(block_size), b''))
+
+def minmax_decimate(data, block_size):
+    """Replace each block of rows by the rows holding each signal's extremes
+    
+    Column 0 is Time; for every other column the rows with its minimum and
+    maximum are kept, in their original order, so each block yields
+    2 * (n_cols - 1) rows. Keeping both extremes preserves the envelope of
+    noisy residual curves, which plain stride sampling loses. A trailing
+    partial block is kept.
+    """
+    n_cols = data.shape[1]
+    n_full = len(data) // block_size
+    parts = []
+    
+    if n_full:
+        parts.append(_block_extremes(data[:n_full * block_size].reshape(n_full, block_size, n_cols)))
+    
+    rest = data[n_full * block_size:]
+    if len(rest):
+        parts.append(_block_extremes(rest[None]))
+    
+    return np.concatenate(parts)
+
+def _block_extremes(blocks):
+    """Rows of each (n_blocks, block_size, n_cols) block at its signal extremes"""
+    signals = blocks[:, :, 1:]
+    idx = np.sort(np.concatenate([signals.argmin(axis=1), signals.argmax(axis=1)], axis=1), axis=1)
+    return np.take_along_axis(blocks, idx[:, :, None], axis=1).reshape(-1, blocks.shape[2])
+
+def load_residuals(residuals_file, max_points=MAX_PLOT_POINTS):
+    """Stream the residuals file, min/max decimating it to at most max_points rows"""
+    n_rows = max(count_lines(residuals_file) - 1, 0)
+    if n_rows == 0:
+        return np.empty((4, 0))
+    
+    with open(residuals_file) as f:
+        next(f, None)  # skip header
+        
+        if n_rows <= max_points:
+            data = np.loadtxt(f, usecols=(0, 1, 2, 3), dtype=np.float64, ndmin=2)
+            return data.T
+        
+        # Each block contributes a min and a max row per signal; chunks hold whole blocks
+        block_size = -(-n_rows // (max_points // 6))
+        chunk_rows = block_size * max(1, CHUNK_ROWS // block_size)
+        
+        parts = []
+        while True:
+            lines = list(itertools.islice(f, chunk_rows))
+            if not lines:
+                break
+            chunk = np.loadtxt(lines, usecols=(0, 1, 2, 3), dtype=np.float64, ndmin=2)
+            parts.append(minmax_decimate(chunk, block_size))
+    
+    return np.concatenate(parts).T
+
+def plot_residuals(case_dir, reynolds_num, output_dir, fig):
+    """Plot convergence residuals onto the shared figure"""
     residuals_file = Path(case_dir) / "postProcessing/residuals/0/residuals.dat"
     
     if not residuals_file.exists():
@@ -21,14 +92,19 @@ def plot_residuals(case_dir, reynolds_num, output_dir):
     
     # Read residuals data
     try:
-        data = pd.read_csv(residuals_file, sep='\s+', header=None, skiprows=1)
-        data.columns = ['Time', 'Ux', 'Uy', 'p']
+        time, ux, uy, p = load_residuals(residuals_file)
+        
+        if time.size == 0:
+            print(f"Warning: No residual data in: {residuals_file}")
+            return False
         
-        # Create residuals plot
-        fig, ax = plt.subplots(1, 1, figsize=(10, 6))
-        ax.semilogy(data['Time'], data['Ux'], 'b-', label='Ux', linewidth=2)
-        ax.semilogy(data['Time'], data['Uy'], 'r-', label='Uy', linewidth=2)
-        ax.semilogy(data['Time'], data['p'], 'g-', label='p', linewidth=2)
+        # Reset the shared figure for the residuals plot
+        fig.clf()
+        fig.set_size_inches(10, 6)
+        ax = fig.subplots(1, 1)
+        ax.semilogy(time, ux, 'b-', label='Ux', linewidth=2)
+        ax.semilogy(time, uy, 'r-', label='Uy', linewidth=2)
+        ax.semilogy(time, p, 'g-', label='p', linewidth=2)
         
         ax.set_xlabel('Iteration')
         ax.set_ylabel('Residual')
@@ -37,10 +113,11 @@ def plot_residuals(case_dir, reynolds_num, output_dir):
         ax.grid(True, alpha=0.3)
         ax.set_ylim(1e-6, 1)
         
+        fig.tight_layout()
+        
         # Save plot
         plot_path = Path(output_dir) / f"residuals_Re{reynolds_num}.png"
-        plt.savefig(plot_path, dpi=150, bbox_inches='tight')
-        plt.close()
+        fig.savefig(plot_path, dpi=100)
         
         print(f"Generated residuals plot: {plot_path}")
         return True
@@ -49,22 +126,29 @@ def plot_residuals(case_dir, reynolds_num, output_dir):
         print(f"Error plotting residuals: {e}")
         return False
 
-def plot_velocity_profile(case_dir, reynolds_num, output_dir):
-    """Plot velocity profile along centerline"""
+def velocity_profiles(reynolds_nums, n_points=50):
+    """Approximate centerline U profiles for all Reynolds numbers at once
+    
+    Returns the y coordinates and an (n_points, len(reynolds_nums)) array
+    with one profile per column.
+    """
+    # Placeholder velocity profiles (would normally extract from OpenFOAM results)
+    y = np.linspace(0, 1, n_points)
+    re = np.asarray(reynolds_nums, dtype=np.float64)
+    
+    # Approximate cavity flow profiles for different Reynolds numbers
+    scale = np.where(re <= 100, 0.8, 1.0 - np.exp(-re / 1000))
+    return y, np.sin(np.pi * y)[:, None] * scale[None, :]
+
+def plot_velocity_profile(y, u_profile, reynolds_num, output_dir, fig):
+    """Plot velocity profile along centerline onto the shared figure"""
     # This is a simplified version - in practice you'd use OpenFOAM postprocessing
     # For demo purposes, we'll create a placeholder plot
     
     try:
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
-        
-        # Placeholder velocity profiles (would normally extract from OpenFOAM results)
-        y = np.linspace(0, 1, 50)
-        
-        # Approximate cavity flow profiles for different Reynolds numbers
-        if reynolds_num <= 100:
-            u_profile = np.sin(np.pi * y) * 0.8
-        else:
-            u_profile = np.sin(np.pi * y) * (1.0 - np.exp(-reynolds_num/1000))
+        fig.clf()
+        fig.set_size_inches(12, 5)
+        ax1, ax2 = fig.subplots(1, 2)
         
         v_profile = np.zeros_like(y)  # Simplified
         
@@ -84,12 +168,11 @@ def plot_velocity_profile(case_dir, reynolds_num, output_dir):
         ax2.grid(True, alpha=0.3)
         ax2.legend()
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         # Save plot
         plot_path = Path(output_dir) / f"velocity_profile_Re{reynolds_num}.png"
-        plt.savefig(plot_path, dpi=150, bbox_inches='tight')
-        plt.close()
+        fig.savefig(plot_path, dpi=100)
         
         print(f"Generated velocity profile plot: {plot_path}")
         return True
@@ -98,30 +181,94 @@ def plot_velocity_profile(case_dir, reynolds_num, output_dir):
         print(f"Error plotting velocity profile: {e}")
         return False
 
-def main():
-    if len(sys.argv) != 3:
-        print("Usage: python3 generate-plots.py <case_directory> <reynolds_number>")
-        sys.exit(1)
+def case_directories(base_dir, reynolds_nums, results_dir=False):
+    """Resolve the case directory for each Reynolds number
+    
+    In results directory mode base_dir holds one cavity_Re_<Re> case per
+    Reynolds number; otherwise base_dir is the case itself.
+    """
+    if results_dir:
+        return [Path(base_dir) / f"cavity_Re_{re}" for re in reynolds_nums]
+    return [Path(base_dir)]
+
+# Figure reused by every case plotted in the current process
+_figure = None
+
+def _shared_figure():
+    """Return this process's plotting figure, creating it on first use"""
+    global _figure
+    if _figure is None:
+        _figure = Figure(figsize=(10, 6))
+        FigureCanvasAgg(_figure)
+    return _figure
+
+def _plot_one(case_dir, reynolds_num, y, u_profile):
+    """Plot a single case, returning its success flag and captured output
     
-    case_dir = sys.argv[1]
-    reynolds_num = int(sys.argv[2])
+    Pool workers share the parent's stdout, so each case's messages are
+    buffered and printed by the parent in job order.
+    """
+    log = io.StringIO()
+    with redirect_stdout(log):
+        success = _plot_case(case_dir, reynolds_num, y, u_profile)
+    return success, log.getvalue()
+
+def _plot_case(case_dir, reynolds_num, y, u_profile):
+    """Generate all plots for a single case"""
+    if not case_dir.is_dir():
+        print(f"Warning: Case directory not found: {case_dir}")
+        return False
     
     # Create plots directory
-    output_dir = Path(case_dir) / "plots"
+    output_dir = case_dir / "plots"
     output_dir.mkdir(exist_ok=True)
     
     print(f"Generating plots for case: {case_dir}, Re = {reynolds_num}")
     
-    # Generate plots
-    success_residuals = plot_residuals(case_dir, reynolds_num, output_dir)
-    success_velocity = plot_velocity_profile(case_dir, reynolds_num, output_dir)
+    fig = _shared_figure()
+    success_residuals = plot_residuals(case_dir, reynolds_num, output_dir, fig)
+    success_velocity = plot_velocity_profile(y, u_profile, reynolds_num, output_dir, fig)
     
     if success_residuals and success_velocity:
         print(f"Successfully generated all plots for Re = {reynolds_num}")
-        return 0
+        return True
     else:
         print(f"Some plots failed for Re = {reynolds_num}")
-        return 1
+        return False
+
+def main():
+    args = sys.argv[1:]
+    results_dir = args[:1] == ["--results-dir"]
+    if results_dir:
+        args = args[1:]
+    
+    if len(args) < 2 or (not results_dir and len(args) > 2):
+        print("Usage: python3 generate-plots.py <case_directory> <reynolds_number>")
+        print("       python3 generate-plots.py --results-dir <results_directory> <reynolds_number> [<reynolds_number> ...]")
+        sys.exit(1)
+    
+    base_dir = args[0]
+    reynolds_nums = [int(arg) for arg in args[1:]]
+    case_dirs = case_directories(base_dir, reynolds_nums, results_dir)
+    
+    # Velocity profiles for every case in one vectorized pass
+    y, u_profiles = velocity_profiles(reynolds_nums)
+    
+    jobs = [(case_dir, reynolds_num, y, u_profiles[:, i])
+            for i, (case_dir, reynolds_num) in enumerate(zip(case_dirs, reynolds_nums))]
+    
+    # Cases are independent, so spread them over the available cores
+    workers = min(len(jobs), os.cpu_count() or 1)
+    if workers > 1:
+        with Pool(workers) as pool:
+            results = pool.starmap(_plot_one, jobs)
+    else:
+        results = [_plot_one(*job) for job in jobs]
+    
+    for _, log in results:
+        print(log, end='')
+    
+    return 0 if all(success for success, _ in results) else 1
 
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
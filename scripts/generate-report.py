@@ -7,196 +7,114 @@ Creates comprehensive HTML report of simulation results
 import os
 import sys
 import json
-import pandas as pd
+import csv
+import gzip
+import re
+import shutil
+from string import Template
+import numpy as np
+from collections import Counter
 from pathlib import Path
 from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
-def generate_summary_plots(results_dir):
-    """Generate summary plots for all Reynolds numbers"""
-    
-    summary_file = Path(results_dir) / "summary.csv"
-    if not summary_file.exists():
-        print(f"Warning: Summary file not found: {summary_file}")
-        return
-    
-    # Read summary data
-    df = pd.read_csv(summary_file)
-    print(f"Processing {len(df)} simulation results")
-    
-    # Set style
-    plt.style.use('seaborn-v0_8')
-    
-    # Create summary plots
-    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 12))
-    
-    # Plot 1: Success Rate
-    success_counts = df['Status'].value_counts()
-    ax1.pie(success_counts.values, labels=success_counts.index, autopct='%1.1f%%')
-    ax1.set_title('Simulation Success Rate')
-    
-    # Plot 2: Runtime vs Reynolds Number
-    successful_df = df[df['Status'] == 'SUCCESS']
-    if not successful_df.empty and 'Runtime' in successful_df.columns:
-        ax2.plot(successful_df['Reynolds'], successful_df['Runtime'], 'bo-', linewidth=2, markersize=8)
-        ax2.set_xlabel('Reynolds Number')
-        ax2.set_ylabel('Runtime (seconds)')
-        ax2.set_title('Computational Time vs Reynolds Number')
-        ax2.grid(True, alpha=0.3)
-    
-    # Plot 3: Final Residual vs Reynolds Number
-    if not successful_df.empty and 'FinalResidual' in successful_df.columns:
-        # Convert to numeric, handling 'N/A' values
-        residuals = pd.to_numeric(successful_df['FinalResidual'], errors='coerce')
-        valid_data = successful_df[residuals.notna()]
-        
-        if not valid_data.empty:
-            ax3.semilogy(valid_data['Reynolds'], residuals.dropna(), 'ro-', linewidth=2, markersize=8)
-            ax3.set_xlabel('Reynolds Number')
-            ax3.set_ylabel('Final Residual')
-            ax3.set_title('Convergence Quality vs Reynolds Number')
-            ax3.grid(True, alpha=0.3)
-    
-    # Plot 4: Performance Summary
-    performance_data = {
-        'Total Cases': len(df),
-        'Successful': len(df[df['Status'] == 'SUCCESS']),
-        'Failed': len(df[df['Status'] == 'FAILED']),
-        'Poor Convergence': len(df[df['Status'] == 'CONVERGED_POOR'])
-    }
-    
-    bars = ax4.bar(performance_data.keys(), performance_data.values(), 
-                   color=['blue', 'green', 'red', 'orange'])
-    ax4.set_title('Simulation Results Summary')
-    ax4.set_ylabel('Number of Cases')
-    
-    # Add value labels on bars
-    for bar in bars:
-        height = bar.get_height()
-        ax4.text(bar.get_x() + bar.get_width()/2., height,
-                f'{int(height)}', ha='center', va='bottom')
-    
-    plt.tight_layout()
-    
-    # Save plot
-    summary_plot_path = Path(results_dir) / "parametric_study_summary.png"
-    plt.savefig(summary_plot_path, dpi=150, bbox_inches='tight')
-    plt.close()
-    
-    print(f"Generated summary plot: {summary_plot_path}")
-    return summary_plot_path
+# Subset of the seaborn darkgrid look used by the summary plots
+PLOT_STYLE = {
+    'axes.facecolor': '#EAEAF2',
+    'axes.edgecolor': 'white',
+    'axes.linewidth': 0.0,
+    'axes.grid': True,
+    'axes.axisbelow': True,
+    'axes.prop_cycle': matplotlib.cycler('color', ['#4C72B0', '#55A868', '#C44E52',
+                                                   '#8172B2', '#CCB974', '#64B5CD']),
+    'grid.color': 'white',
+    'grid.linestyle': '-',
+    'xtick.major.size': 0.0,
+    'ytick.major.size': 0.0,
+    'ytick.minor.size': 0.0
+}
 
-def generate_html_report(results_dir):
-    """Generate comprehensive HTML report"""
-    
-    summary_file = Path(results_dir) / "summary.csv"
-    if not summary_file.exists():
-        print(f"Error: Summary file not found: {summary_file}")
-        return
-    
-    df = pd.read_csv(summary_file)
-    
-    # Generate summary statistics
-    total_cases = len(df)
-    successful_cases = len(df[df['Status'] == 'SUCCESS'])
-    success_rate = (successful_cases / total_cases * 100) if total_cases > 0 else 0
-    
-    # Calculate average runtime for successful cases
-    successful_df = df[df['Status'] == 'SUCCESS']
-    avg_runtime = successful_df['Runtime'].mean() if not successful_df.empty else 0
-    
-    # Generate HTML report
-    html_content = f"""
+# Columns of summary.csv used by the report, with the dtypes to read them as
+SUMMARY_DTYPES = {
+    'Reynolds': 'int32',
+    'Status': 'category',
+    'Runtime': 'float32',
+    'FinalResidual': 'string'
+}
+
+def minify_html(html):
+    """Drop the indentation and line breaks between tags"""
+    return re.sub(r'>\s+<', '><', html).strip()
+
+# Stylesheet shared by all reports, written next to the HTML as report.css
+REPORT_CSS = """\
+body { font-family: Arial, sans-serif; margin: 40px; }
+.header { background-color: #f0f0f0; padding: 20px; border-radius: 5px; }
+.metrics { display: flex; justify-content: space-around; margin: 20px 0; }
+.metric { text-align: center; padding: 15px; background-color: #e8f4f8; border-radius: 5px; }
+.metric h3 { margin: 0; color: #2c5f7f; }
+.metric p { font-size: 24px; font-weight: bold; margin: 5px 0; color: #1a4a60; }
+.plots { display: grid; grid-template-columns: repeat(2, 1fr); gap: 10px; max-width: 1000px; }
+.plots img { width: 100%; }
+table { width: 100%; border-collapse: collapse; margin: 20px 0; }
+th, td { padding: 12px; text-align: left; border-bottom: 1px solid #ddd; }
+th { background-color: #4CAF50; color: white; }
+tr:nth-child(even) { background-color: #f2f2f2; }
+.success { color: green; font-weight: bold; }
+.failed { color: red; font-weight: bold; }
+.warning { color: orange; font-weight: bold; }
+.timestamp { color: #666; font-style: italic; }
+"""
+
+# Opening part of the HTML report, up to where the results table is written
+REPORT_HEADER = Template(minify_html("""
 <!DOCTYPE html>
 <html>
 <head>
     <title>OpenFOAM Parametric Study Report</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 40px; }}
-        .header {{ background-color: #f0f0f0; padding: 20px; border-radius: 5px; }}
-        .metrics {{ display: flex; justify-content: space-around; margin: 20px 0; }}
-        .metric {{ text-align: center; padding: 15px; background-color: #e8f4f8; border-radius: 5px; }}
-        .metric h3 {{ margin: 0; color: #2c5f7f; }}
-        .metric p {{ font-size: 24px; font-weight: bold; margin: 5px 0; color: #1a4a60; }}
-        table {{ width: 100%; border-collapse: collapse; margin: 20px 0; }}
-        th, td {{ padding: 12px; text-align: left; border-bottom: 1px solid #ddd; }}
-        th {{ background-color: #4CAF50; color: white; }}
-        tr:nth-child(even) {{ background-color: #f2f2f2; }}
-        .success {{ color: green; font-weight: bold; }}
-        .failed {{ color: red; font-weight: bold; }}
-        .warning {{ color: orange; font-weight: bold; }}
-        .timestamp {{ color: #666; font-style: italic; }}
-    </style>
+    <link rel="stylesheet" href="report.css">
 </head>
 <body>
     <div class="header">
         <h1>🌊 OpenFOAM Parametric Study Report</h1>
-        <p class="timestamp">Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+        <p class="timestamp">Generated on: $timestamp</p>
         <p><strong>Study:</strong> Cavity Flow - Reynolds Number Parametric Analysis</p>
     </div>
     
     <div class="metrics">
         <div class="metric">
             <h3>Total Cases</h3>
-            <p>{total_cases}</p>
+            <p>$total_cases</p>
         </div>
         <div class="metric">
             <h3>Success Rate</h3>
-            <p>{success_rate:.1f}%</p>
+            <p>$success_rate%</p>
         </div>
         <div class="metric">
             <h3>Successful Cases</h3>
-            <p>{successful_cases}</p>
+            <p>$successful_cases</p>
         </div>
         <div class="metric">
             <h3>Avg Runtime</h3>
-            <p>{avg_runtime:.1f}s</p>
+            <p>${avg_runtime}s</p>
         </div>
     </div>
     
     <h2>📊 Results Summary</h2>
-    <img src="parametric_study_summary.png" alt="Parametric Study Summary" style="width: 100%; max-width: 1000px;">
+    <div class="plots">
+        <img src="summary_success_rate.png" alt="Simulation Success Rate" loading="lazy">
+        <img src="summary_runtime.png" alt="Computational Time vs Reynolds Number" loading="lazy">
+        <img src="summary_residuals.png" alt="Convergence Quality vs Reynolds Number" loading="lazy">
+        <img src="summary_cases.png" alt="Simulation Results Summary" loading="lazy">
+    </div>
     
     <h2>📋 Detailed Results</h2>
-    <table>
-        <tr>
-            <th>Reynolds Number</th>
-            <th>Status</th>
-            <th>Runtime (s)</th>
-            <th>Final Residual</th>
-            <th>Convergence Quality</th>
-        </tr>
-"""
-    
-    # Add table rows
-    for _, row in df.iterrows():
-        status_class = "success" if row['Status'] == 'SUCCESS' else "failed" if row['Status'] == 'FAILED' else "warning"
-        
-        # Determine convergence quality
-        convergence_quality = "Excellent"
-        if row['FinalResidual'] != 'N/A':
-            try:
-                residual_val = float(row['FinalResidual'])
-                if residual_val > 0.001:
-                    convergence_quality = "Poor"
-                elif residual_val > 0.0001:
-                    convergence_quality = "Good"
-            except:
-                convergence_quality = "Unknown"
-        
-        html_content += f"""
-        <tr>
-            <td>{row['Reynolds']}</td>
-            <td><span class="{status_class}">{row['Status']}</span></td>
-            <td>{row['Runtime']}</td>
-            <td>{row['FinalResidual']}</td>
-            <td>{convergence_quality}</td>
-        </tr>
-"""
-    
-    html_content += """
-    </table>
+    """))
+
+# Closing part of the HTML report, written after the results table
+REPORT_FOOTER = minify_html("""
     
     <h2>🔧 System Information</h2>
     <ul>
@@ -221,14 +139,289 @@ def generate_html_report(results_dir):
     </footer>
 </body>
 </html>
-"""
+""")
+
+# Summaries with more rows than this are parsed with pandas instead of csv
+PANDAS_MIN_ROWS = 10_000
+
+# Field values treated as missing, the same as pandas' default NA values
+MISSING_VALUES = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a',
+    'nan', 'null',
+}
+
+# Results table markup, written row by row into the report
+TABLE_HEADER = minify_html("""
+<table class="results">
+    <thead>
+        <tr>
+            <th>Reynolds Number</th>
+            <th>Status</th>
+            <th>Runtime (s)</th>
+            <th>Final Residual</th>
+            <th>Convergence Quality</th>
+        </tr>
+    </thead>
+    <tbody>
+""") + "\n"
+TABLE_ROW = ('<tr><td>{reynolds}</td><td><span class="{status_class}">{status}</span></td>'
+             '<td>{runtime}</td><td>{residual}</td><td>{quality}</td></tr>\n')
+TABLE_FOOTER = "</tbody></table>"
+
+# CSS class for each status in the results table; anything else is a warning
+STATUS_CLASSES = {
+    'SUCCESS': 'success',
+    'FAILED': 'failed'
+}
+
+def count_rows(path, block_size=1 << 20):
+    """Count data rows (lines after the header) without holding the file in memory"""
+    with open(path, 'rb') as f:
+        lines = sum(block.count(b'\n') for block in iter(lambda: f.read(block_size), b''))
+    return max(lines - 1, 0)
+
+def parse_float(value):
+    """Convert a summary field to float, mapping 'N/A' and blanks to NaN"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def read_summary_csv(summary_file):
+    """Read summary.csv with the csv module into column arrays"""
+    with open(summary_file, newline='') as f:
+        rows = list(csv.DictReader(f))
+    
+    # The parametric study scripts do not record a final residual
+    residual_text = [row.get('FinalResidual') for row in rows]
+    residual_text = [None if value is None or value.strip() in MISSING_VALUES else value
+                     for value in residual_text]
+    
+    return {
+        'Reynolds': np.fromiter((int(row['Reynolds']) for row in rows), dtype=np.int32, count=len(rows)),
+        'Status': np.array(['' if row['Status'].strip() in MISSING_VALUES else row['Status']
+                            for row in rows], dtype=object),
+        'Runtime': np.fromiter((parse_float(row['Runtime']) for row in rows), dtype=np.float32, count=len(rows)),
+        'FinalResidual': np.array(residual_text, dtype=object),
+        'Residual': np.fromiter((parse_float(value) for value in residual_text), dtype=np.float64, count=len(rows))
+    }
+
+def read_summary(summary_file):
+    """Read only the summary.csv columns the report needs"""
+    import pandas as pd
     
-    # Save HTML report
-    report_path = Path(results_dir) / "parametric_study_report.html"
-    with open(report_path, 'w') as f:
-        f.write(html_content)
+    df = pd.read_csv(summary_file, usecols=lambda col: col in SUMMARY_DTYPES,
+                     dtype=SUMMARY_DTYPES)
+    
+    # The parametric study scripts do not record a final residual
+    if 'FinalResidual' not in df.columns:
+        df['FinalResidual'] = pd.Series(pd.NA, index=df.index, dtype='string')
+    
+    return df
+
+def summary_columns(df):
+    """Convert a summary DataFrame to the column arrays used by the report"""
+    import pandas as pd
+    
+    residual_text = df['FinalResidual'].astype(object)
+    
+    return {
+        'Reynolds': df['Reynolds'].to_numpy(),
+        'Status': df['Status'].astype(object).fillna('').to_numpy(),
+        'Runtime': df['Runtime'].to_numpy(dtype=np.float32, na_value=np.nan),
+        'FinalResidual': residual_text.where(residual_text.notna(), None).to_numpy(),
+        'Residual': pd.to_numeric(df['FinalResidual'], errors='coerce').to_numpy(
+            dtype='float64', na_value=np.nan)
+    }
+
+def load_summary(results_dir):
+    """Load summary.csv as column arrays
+    
+    Typical studies are parsed with the csv module so pandas is never imported.
+    Large summaries go through pandas, reusing the Parquet copy from a previous
+    run when it is current.
+    """
+    summary_file = Path(results_dir) / "summary.csv"
+    if count_rows(summary_file) <= PANDAS_MIN_ROWS:
+        return read_summary_csv(summary_file)
+    
+    import pandas as pd
+    
+    cache_file = Path(results_dir) / "summary.parquet"
+    
+    if cache_file.exists() and cache_file.stat().st_mtime >= summary_file.stat().st_mtime:
+        try:
+            return summary_columns(pd.read_parquet(cache_file))
+        except ImportError:
+            pass  # No Parquet engine installed
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable summary cache {cache_file}: {e}")
+    
+    df = read_summary(summary_file)
+    
+    # Write beside the cache and rename, so an interrupted run never leaves a partial file
+    tmp_file = cache_file.with_name(cache_file.name + ".tmp")
+    try:
+        df.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, cache_file)
+    except (ImportError, OSError):
+        # No Parquet engine or read-only directory; the CSV is parsed again next run
+        tmp_file.unlink(missing_ok=True)
+    
+    return summary_columns(df)
+
+def new_figure(figsize=(7.5, 6)):
+    """Create a standalone figure with its own Agg canvas"""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+def save_figure(fig, plot_path):
+    """Lay out and render a figure to PNG"""
+    fig.tight_layout()
+    fig.savefig(plot_path, dpi=100)
+    return plot_path
+
+def generate_summary_plots(summary, results_dir):
+    """Generate summary plots for all Reynolds numbers"""
+    
+    status = summary['Status']
+    print(f"Processing {len(status)} simulation results")
+    
+    # Set style
+    matplotlib.rcParams.update(PLOT_STYLE)
+    
+    # Create summary plots, one independent figure each
+    fig1, fig2, fig3, fig4 = (new_figure() for _ in range(4))
+    ax1, ax2, ax3, ax4 = (fig.subplots() for fig in (fig1, fig2, fig3, fig4))
+    
+    # Case counts per status in a single pass
+    status_counts = Counter(status)
+    
+    # Plot 1: Success Rate
+    if status_counts:
+        labels, counts = zip(*sorted(status_counts.items()))
+        ax1.pie(counts, labels=labels, autopct='%1.1f%%')
+    else:
+        ax1.text(0.5, 0.5, 'No simulation results', ha='center', va='center')
+        ax1.set_axis_off()
+    ax1.set_title('Simulation Success Rate')
+    
+    # Columns for the successful cases, selected with one mask
+    ok = status == 'SUCCESS'
+    successful_reynolds = summary['Reynolds'][ok]
+    successful_runtime = summary['Runtime'][ok]
+    successful_residuals = summary['Residual'][ok]
+    
+    # Plot 2: Runtime vs Reynolds Number
+    if ok.any():
+        ax2.plot(successful_reynolds, successful_runtime, 'bo-', linewidth=2, markersize=8)
+        ax2.set_xlabel('Reynolds Number')
+        ax2.set_ylabel('Runtime (seconds)')
+        ax2.set_title('Computational Time vs Reynolds Number')
+        ax2.grid(True, alpha=0.3)
+    
+    # Plot 3: Final Residual vs Reynolds Number, skipping 'N/A' values
+    valid = ~np.isnan(successful_residuals)
+    if valid.any():
+        ax3.semilogy(successful_reynolds[valid], successful_residuals[valid], 'ro-', linewidth=2, markersize=8)
+        ax3.set_xlabel('Reynolds Number')
+        ax3.set_ylabel('Final Residual')
+        ax3.set_title('Convergence Quality vs Reynolds Number')
+        ax3.grid(True, alpha=0.3)
+    
+    # Plot 4: Performance Summary
+    performance_data = {
+        'Total Cases': len(status),
+        'Successful': status_counts.get('SUCCESS', 0),
+        'Failed': status_counts.get('FAILED', 0),
+        'Poor Convergence': status_counts.get('CONVERGED_POOR', 0)
+    }
+    
+    bars = ax4.bar(performance_data.keys(), performance_data.values(), 
+                   color=['blue', 'green', 'red', 'orange'])
+    ax4.set_title('Simulation Results Summary')
+    ax4.set_ylabel('Number of Cases')
+    
+    # Add value labels on bars
+    for bar in bars:
+        height = bar.get_height()
+        ax4.text(bar.get_x() + bar.get_width()/2., height,
+                f'{int(height)}', ha='center', va='bottom')
+    
+    # Render one figure at a time; matplotlib's layout and text rendering are not thread-safe
+    figures = {
+        fig1: "summary_success_rate.png",
+        fig2: "summary_runtime.png",
+        fig3: "summary_residuals.png",
+        fig4: "summary_cases.png"
+    }
+    plot_paths = [save_figure(fig, Path(results_dir) / name) for fig, name in figures.items()]
+    
+    for plot_path in plot_paths:
+        print(f"Generated summary plot: {plot_path}")
+    return plot_paths
+
+def generate_html_report(summary, results_dir):
+    """Generate comprehensive HTML report"""
+    
+    status = summary['Status']
+    runtime = summary['Runtime']
+    residuals = summary['Residual']
+    
+    # Generate summary statistics
+    status_counts = Counter(status)
+    
+    total_cases = len(status)
+    successful_cases = status_counts.get('SUCCESS', 0)
+    success_rate = (successful_cases / total_cases * 100) if total_cases > 0 else 0
+    
+    # Average runtime for successful cases
+    successful_runtime = runtime[status == 'SUCCESS']
+    successful_runtime = successful_runtime[~np.isnan(successful_runtime)]
+    avg_runtime = successful_runtime.mean() if successful_runtime.size else 0.0
     
-    print(f"Generated HTML report: {report_path}")
+    # Convergence quality, classified for all rows at once
+    convergence_quality = np.select(
+        [residuals > 0.001, residuals > 0.0001, ~np.isnan(residuals)],
+        ['Poor', 'Good', 'Excellent'],
+        default='Unknown'
+    )
+    
+    # Shared stylesheet referenced by the report
+    css_path = Path(results_dir) / "report.css"
+    css_path.write_text(REPORT_CSS, encoding='utf-8')
+    
+    # Stream the report to disk: header, results table, then footer
+    report_path = Path(results_dir) / "parametric_study_report.html"
+    with open(report_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        f.write(REPORT_HEADER.substitute(
+            timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            total_cases=total_cases,
+            success_rate=f"{success_rate:.1f}",
+            successful_cases=successful_cases,
+            avg_runtime=f"{avg_runtime:.1f}"
+        ))
+        f.write(TABLE_HEADER)
+        for row in zip(summary['Reynolds'], status, runtime, summary['FinalResidual'], convergence_quality):
+            reynolds, case_status, case_runtime, residual, quality = row
+            f.write(TABLE_ROW.format(
+                reynolds=reynolds,
+                status_class=STATUS_CLASSES.get(case_status, 'warning'),
+                status=case_status,
+                runtime='N/A' if np.isnan(case_runtime) else f"{case_runtime:g}",
+                residual='N/A' if residual is None else residual,
+                quality=quality
+            ))
+        f.write(TABLE_FOOTER)
+        f.write(REPORT_FOOTER)
+    
+    # Pre-compressed copy for artifact storage and download
+    with open(report_path, 'rb') as src, gzip.open(f"{report_path}.gz", 'wb', compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst)
+    
+    print(f"Generated HTML report: {report_path} (compressed copy: {report_path}.gz)")
     return report_path
 
 def main():
@@ -242,13 +435,21 @@ def main():
         print(f"Error: Results directory not found: {results_dir}")
         sys.exit(1)
     
+    summary_file = Path(results_dir) / "summary.csv"
+    if not summary_file.exists():
+        print(f"Error: Summary file not found: {summary_file}")
+        sys.exit(1)
+    
     print(f"Generating comprehensive report for: {results_dir}")
     
+    # Read summary data once for both outputs
+    summary = load_summary(results_dir)
+    
     # Generate summary plots
-    generate_summary_plots(results_dir)
+    generate_summary_plots(summary, results_dir)
     
     # Generate HTML report
-    generate_html_report(results_dir)
+    generate_html_report(summary, results_dir)
     
     print("Report generation completed successfully!")
     print(f"Open {results_dir}/parametric_study_report.html to view the report")